@@ -10,20 +10,16 @@ Parallel strategy:
   - Sample processing     → ProcessPoolExecutor (CPU-bound, contourne le GIL)
 """
 
+# Seuls les modules nécessaires au démarrage du CLI (--help, erreurs argparse)
+# sont importés ici ; les modules plus lourds (zipfile, urllib, shutil,
+# concurrent.futures...) sont importés paresseusement dans leurs fonctions.
 import argparse
-import zipfile
-import tempfile
-import shutil
+import heapq
 from pathlib import Path
 import logging
 import sys
 import re
-import json
 import os
-import urllib.request
-import urllib.error
-import subprocess
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -53,71 +49,281 @@ GNOMAD_FILENAME = "gnomad.v2.1.1.lof_metrics.by_gene.txt"
 MENDEL_FILENAME = "mendeliome_australia.json"
 
 
-def _progress_hook(block_num, block_size, total_size):
-    downloaded = block_num * block_size
-    if total_size > 0:
-        pct = min(downloaded / total_size * 100, 100)
-        mb = downloaded / 1_048_576
-        print(f"\r   {pct:5.1f}%  ({mb:.1f} MB)", end="", flush=True)
+def _inflate_stream(src, f_out):
+    """Décompresse un flux gzip/BGZF chunk par chunk vers f_out.
 
+    zlib.decompressobj(wbits=31) décode l'en-tête gzip directement, sans
+    le _PaddedFile/BufferedReader de gzip.GzipFile ni ses petits buffers
+    internes ; les membres BGZF concaténés sont enchaînés à la main.
+    """
+    try:
+        # python-isal : inflate vectorisé (SSE4.2/AVX2), 2-4x plus rapide
+        # que zlib ; API identique, repli silencieux sur la stdlib
+        from isal import isal_zlib as zlib
+    except ImportError:
+        import zlib
+    decomp = zlib.decompressobj(wbits=31)
+    while chunk := src.read(1 << 20):
+        f_out.write(decomp.decompress(chunk))
+        # BGZF = suite de membres gzip : repartir sur le reliquat
+        while decomp.eof and decomp.unused_data:
+            tail = decomp.unused_data
+            decomp = zlib.decompressobj(wbits=31)
+            f_out.write(decomp.decompress(tail))
+    f_out.write(decomp.flush())
+
+
+def _download_gunzip(url: str, dst: Path):
+    """Télécharge et décompresse un .gz/.bgz en un seul flux.
+
+    Les octets ne traversent la mémoire qu'une fois : aucun fichier
+    compressé intermédiaire n'est écrit sur disque (BGZF est compatible
+    gzip, le même chemin sert pour gnomAD).
+    """
+    import urllib.request
+    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    # Écriture atomique : le flux décompressé passe par un .part renommé à
+    # la toute fin ; un téléchargement interrompu ne laisse jamais sous dst
+    # un fichier tronqué mais plausible (que _download_if_changed croirait
+    # ensuite à jour si le HEAD échoue).
+    part = dst.with_name(dst.name + ".part")
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp, \
+                open(part, 'wb') as f_out:
+            _inflate_stream(resp, f_out)
+        os.replace(part, dst)
+    finally:
+        part.unlink(missing_ok=True)
 
-def _wget_download(url: str, dest: Path):
-    """Download with wget if available, else urllib fallback."""
+
+def _ranged_download_gunzip(url: str, dst: Path, workers: int = 4) -> bool:
+    """Télécharge via des Range GET parallèles puis décompresse localement.
+
+    Contourne le plafond de débit par connexion des miroirs (EBI). Ne
+    vaut le coup que pour les gros fichiers ; retourne False (repli
+    single-GET chez l'appelant) si le serveur n'annonce pas le support
+    des ranges, si la taille est inconnue ou petite, ou sur erreur.
+    """
+    import tempfile
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    headers = {"User-Agent": "Mozilla/5.0"}
     try:
-        subprocess.run(
-            ["wget", "-q", "--show-progress", "-O", str(dest), url],
-            check=True
-        )
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        logger.info("   wget non disponible, utilisation de urllib...")
-        urllib.request.urlretrieve(url, dest, reporthook=_progress_hook)
-        print()
+        head = urllib.request.Request(url, method="HEAD", headers=headers)
+        with urllib.request.urlopen(head, timeout=30) as resp:
+            size = int(resp.headers.get("Content-Length") or 0)
+            ranges_ok = resp.headers.get("Accept-Ranges") == "bytes"
+    except Exception as e:
+        logger.debug("HEAD %s impossible : %s", url, e)
+        return False
+    if not ranges_ok or size < (8 << 20):
+        return False
+
+    def _fetch_range(fd, start, end):
+        req = urllib.request.Request(
+            url, headers={**headers, "Range": f"bytes={start}-{end}"})
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            offset = start
+            while chunk := resp.read(1 << 20):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+
+    bounds = [(i * size // workers, (i + 1) * size // workers - 1)
+              for i in range(workers)]
+    tmp = tempfile.NamedTemporaryFile(dir=dst.parent, suffix=".gz.part",
+                                      delete=False)
+    tmp_path = Path(tmp.name)
+    # Même écriture atomique que _download_gunzip pour la sortie décompressée
+    out_part = dst.with_name(dst.name + ".part")
+    try:
+        os.ftruncate(tmp.fileno(), size)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(_fetch_range, tmp.fileno(), a, b)
+                           for a, b in bounds]:
+                future.result()
+        tmp.flush()
+        with open(tmp_path, 'rb') as f_in, open(out_part, 'wb') as f_out:
+            _inflate_stream(f_in, f_out)
+        os.replace(out_part, dst)
+    except Exception as e:
+        logger.warning(f"   Téléchargement par ranges échoué ({e}), repli single-GET")
+        return False
+    finally:
+        tmp.close()
+        tmp_path.unlink(missing_ok=True)
+        out_part.unlink(missing_ok=True)
+    return True
+
+
+def _remote_last_modified(url: str):
+    """Récupère l'en-tête Last-Modified via un HEAD (None si indisponible)."""
+    import urllib.request
+    try:
+        req = urllib.request.Request(url, method="HEAD",
+                                     headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.headers.get("Last-Modified")
+    except Exception as e:
+        logger.debug("HEAD %s impossible : %s", url, e)
+        return None
+
 
+def _download_if_changed(url: str, dst: Path, fetch) -> bool:
+    """Appelle fetch() sauf si dst est à jour vis-à-vis du serveur.
 
-def _gunzip(src: Path, dst: Path):
-    """Decompress a .gz or .bgz file."""
-    import gzip
-    logger.info(f"   Décompression de {src.name}...")
-    with gzip.open(src, 'rb') as f_in, open(dst, 'wb') as f_out:
-        shutil.copyfileobj(f_in, f_out)
-    src.unlink()
+    Le Last-Modified distant est conservé dans un sidecar ``<dst>.lm`` :
+    aux runs suivants un simple HEAD (un RTT) suffit pour détecter une
+    mise à jour amont au lieu de re-télécharger le fichier complet. Si
+    le serveur ne répond pas ou n'expose pas l'en-tête, un fichier local
+    existant est gardé tel quel (comportement historique).
+
+    Retourne True si un téléchargement a eu lieu.
+    """
+    sidecar = dst.with_name(dst.name + ".lm")
+    remote_lm = _remote_last_modified(url)
+    if dst.exists():
+        local_lm = sidecar.read_text().strip() if sidecar.exists() else None
+        if remote_lm is None or remote_lm == local_lm:
+            return False
+        logger.info(f"   Mise à jour amont détectée pour {dst.name}")
+    fetch()
+    if remote_lm:
+        sidecar.write_text(remote_lm)
+    return True
 
 
 def download_gencode(ref_dir: Path) -> Path:
     gtf = ref_dir / GTF_FILENAME
-    if gtf.exists():
-        logger.info("✓ GTF GENCODE déjà présent")
-        return gtf
-
-    gz = ref_dir / (GTF_FILENAME + ".gz")
-    logger.info("   Téléchargement GTF GENCODE v44 (~50 MB compressé)...")
-    _wget_download(GENCODE_URL, gz)
-    _gunzip(gz, gtf)
-    logger.info(f"✓ GTF téléchargé ({gtf})")
+
+    def fetch():
+        logger.info("   Téléchargement + décompression GTF GENCODE v44 (~50 MB compressé)...")
+        if not _ranged_download_gunzip(GENCODE_URL, gtf):
+            _download_gunzip(GENCODE_URL, gtf)
+
+    if _download_if_changed(GENCODE_URL, gtf, fetch):
+        logger.info(f"✓ GTF téléchargé ({gtf})")
+    else:
+        logger.info("✓ GTF GENCODE déjà présent et à jour")
     return gtf
 
 
 def download_gnomad(ref_dir: Path) -> Path:
     txt = ref_dir / GNOMAD_FILENAME
-    if txt.exists():
-        logger.info("✓ gnomAD déjà présent")
-        return txt
-
-    bgz = ref_dir / (GNOMAD_FILENAME + ".bgz")
-    logger.info("   Téléchargement gnomAD v2.1.1 (~2 MB)...")
-    _wget_download(GNOMAD_URL, bgz)
-    _gunzip(bgz, txt)
-    logger.info(f"✓ gnomAD téléchargé ({txt})")
+
+    def fetch():
+        logger.info("   Téléchargement + décompression gnomAD v2.1.1 (~2 MB)...")
+        _download_gunzip(GNOMAD_URL, txt)
+
+    if _download_if_changed(GNOMAD_URL, txt, fetch):
+        logger.info(f"✓ gnomAD téléchargé ({txt})")
+    else:
+        logger.info("✓ gnomAD déjà présent et à jour")
     return txt
 
 
+# Session HTTP partagée (keep-alive + pool de connexions TLS) : amortit le
+# handshake TLS sur les N pages PanelApp. requests est optionnel ; repli
+# urllib (une connexion par requête) s'il n'est pas installé.
+_SESSION = None
+
+
+def _get_session():
+    global _SESSION
+    if _SESSION is None:
+        try:
+            import requests
+            _SESSION = requests.Session()
+            _SESSION.headers.update({
+                "User-Agent": "Mozilla/5.0",
+                "Accept-Encoding": "gzip",
+            })
+        except ImportError:
+            _SESSION = False
+    return _SESSION or None
+
+
 def _api_get(url: str) -> dict:
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    import json
+    import urllib.request
+    import zlib
+
+    session = _get_session()
+    if session is not None:
+        resp = session.get(url, timeout=30)
+        resp.raise_for_status()
+        return resp.json()
+
+    # Accept-Encoding: gzip — le JSON PanelApp se compresse à ~85%,
+    # autant d'octets en moins sur le fil pour chaque page
+    req = urllib.request.Request(url, headers={
+        "User-Agent": "Mozilla/5.0",
+        "Accept-Encoding": "gzip",
+    })
     with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode())
+        data = resp.read()
+        if resp.headers.get("Content-Encoding") == "gzip":
+            data = zlib.decompress(data, wbits=31)
+    # json.loads accepte les bytes : pas de copie str intermédiaire
+    return json.loads(data)
+
+
+def _api_get_cached(url: str, cache_dir: Path) -> dict:
+    """GET JSON avec cache disque revalidé par ETag.
+
+    La réponse est stockée sous cache_dir/<sha1(url)>.json avec un sidecar
+    .etag ; les appels suivants envoient If-None-Match et rechargent le
+    cache local sur 304 — une poignée d'octets au lieu de la page entière.
+    """
+    import hashlib
+    import json
+    import urllib.error
+    import urllib.request
+    import zlib
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = hashlib.sha1(url.encode()).hexdigest()
+    body_path = cache_dir / f"{key}.json"
+    etag_path = cache_dir / f"{key}.etag"
+
+    headers = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip"}
+    if body_path.exists() and etag_path.exists():
+        headers["If-None-Match"] = etag_path.read_text().strip()
+
+    session = _get_session()
+    if session is not None:
+        resp = session.get(url, headers=headers, timeout=30)
+        if resp.status_code == 304:
+            return json.loads(body_path.read_bytes())
+        resp.raise_for_status()
+        data = resp.content  # requests décompresse le gzip lui-même
+        if etag := resp.headers.get("ETag"):
+            etag_path.write_text(etag)
+        body_path.write_bytes(data)
+        return json.loads(data)
+
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            data = resp.read()
+            if resp.headers.get("Content-Encoding") == "gzip":
+                data = zlib.decompress(data, wbits=31)
+            etag = resp.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return json.loads(body_path.read_bytes())
+        raise
+
+    body_path.write_bytes(data)
+    if etag:
+        etag_path.write_text(etag)
+    return json.loads(data)
 
 
 def download_mendeliome(ref_dir: Path) -> Path:
+    import json
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
     local = ref_dir / MENDEL_FILENAME
 
     # Récupérer la version distante
@@ -134,14 +340,19 @@ def download_mendeliome(ref_dir: Path) -> Path:
 
     logger.info(f"   Version distante Mendeliome : {remote_version}")
 
-    # Lire la version locale
+    # Lire la version locale : d'abord le sidecar .version (O(1)),
+    # sinon reparse du JSON complet (anciens caches sans sidecar)
+    version_sidecar = ref_dir / (MENDEL_FILENAME + ".version")
     local_version = None
     if local.exists():
-        try:
-            with open(local) as f:
-                local_version = json.load(f).get("version")
-        except Exception:
-            pass
+        if version_sidecar.exists():
+            local_version = version_sidecar.read_text().strip() or None
+        else:
+            try:
+                with open(local) as f:
+                    local_version = json.load(f).get("version")
+            except Exception:
+                pass
     logger.info(f"   Version locale  Mendeliome : {local_version or 'aucune'}")
 
     if remote_version and remote_version == local_version:
@@ -150,31 +361,33 @@ def download_mendeliome(ref_dir: Path) -> Path:
 
     logger.info(f"   Nouvelle version ({local_version or '—'} → {remote_version}). Téléchargement...")
 
-    # ── Étape 1 : récupérer toutes les URLs de pages en séquentiel (on doit connaître "next") ──
-    # Puis télécharger chaque page en parallèle avec des threads (I/O réseau)
-    logger.info("   Collecte des URLs de pages...")
-    page_urls = []
-    url = PANELAPP_AUS_GENES_URL
-    while url:
-        page_urls.append(url)
-        # On lit juste le champ "next" pour découvrir les pages suivantes
-        data = _api_get(url)
-        url = data.get("next")
-
-    logger.info(f"   {len(page_urls)} pages à télécharger en parallèle...")
-
-    # ── Étape 2 : télécharger toutes les pages en parallèle ──
-    pages_results = {}
-    with ThreadPoolExecutor(max_workers=min(len(page_urls), 8)) as executor:
-        future_to_idx = {
-            executor.submit(_api_get, page_url): i
-            for i, page_url in enumerate(page_urls)
-        }
-        for future in as_completed(future_to_idx):
-            idx = future_to_idx[future]
-            pages_results[idx] = future.result()["results"]
-            print(f"\r   {len(pages_results)}/{len(page_urls)} pages récupérées...", end="", flush=True)
-    print()
+    # ── Étape 1 : une seule requête pour la page 1, puis déduction des
+    # URLs restantes depuis "count" — plus de crawl séquentiel des "next"
+    page_cache = ref_dir / ".panelapp_cache"
+    first_page = _api_get_cached(PANELAPP_AUS_GENES_URL, page_cache)
+    page_size = len(first_page.get("results", [])) or 1
+    total = first_page.get("count", page_size)
+    n_pages = -(-total // page_size)  # ceil
+    page_urls = [f"{PANELAPP_AUS_GENES_URL}?page={i}"
+                 for i in range(2, n_pages + 1)]
+
+    logger.info(f"   {n_pages} pages ({total} gènes) — "
+                f"{len(page_urls)} à télécharger en parallèle...")
+
+    # ── Étape 2 : télécharger les pages restantes en parallèle ──
+    # (cache disque + ETag : les pages inchangées sont revalidées en 304)
+    pages_results = {1: first_page["results"]}
+    if page_urls:
+        with ThreadPoolExecutor(max_workers=min(len(page_urls), 8)) as executor:
+            future_to_idx = {
+                executor.submit(_api_get_cached, page_url, page_cache): i
+                for i, page_url in enumerate(page_urls, start=2)
+            }
+            for future in as_completed(future_to_idx):
+                idx = future_to_idx[future]
+                pages_results[idx] = future.result()["results"]
+                print(f"\r   {len(pages_results)}/{n_pages} pages récupérées...", end="", flush=True)
+        print()
 
     # Reconstituer dans l'ordre des pages
     genes = []
@@ -188,8 +401,16 @@ def download_mendeliome(ref_dir: Path) -> Path:
         "stats":    panel_info.get("stats", {}),
         "genes":    genes,
     }
-    with open(local, "w") as f:
-        json.dump(payload, f, indent=2)
+    # Sérialisation compacte : orjson (C, ~5-10x plus rapide) si présent,
+    # sinon json stdlib sans indentation — le pretty-print multipliait la
+    # taille du fichier et le temps d'encodage pour un cache machine
+    try:
+        import orjson
+        local.write_bytes(orjson.dumps(payload))
+    except ImportError:
+        with open(local, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+    version_sidecar.write_text(remote_version)
 
     logger.info(f"✓ Mendeliome téléchargé — {len(genes)} gènes (v{remote_version})")
     return local
@@ -201,6 +422,8 @@ def setup_references(ref_dir: Path = REFERENCES_DIR) -> dict:
     GTF et gnomAD sont téléchargés en parallèle (threads I/O réseau).
     Retourne un dict avec les chemins vers chaque fichier.
     """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
     ref_dir.mkdir(parents=True, exist_ok=True)
 
     logger.info("=" * 60)
@@ -210,17 +433,19 @@ def setup_references(ref_dir: Path = REFERENCES_DIR) -> dict:
     results = {}
     errors = {}
 
-    # GTF et gnomAD en parallèle (tous deux sont des téléchargements I/O réseau)
+    # Les trois téléchargements sont I/O réseau : un seul pool — le check
+    # de version Mendeliome (et sa pagination interne) recouvre le GTF
     download_tasks = {
-        "gtf":    (download_gencode,    ref_dir),
-        "gnomad": (download_gnomad,     ref_dir),
+        "gtf":        download_gencode,
+        "gnomad":     download_gnomad,
+        "mendeliome": download_mendeliome,
     }
 
-    logger.info("\n[1-2/3] GTF GENCODE + gnomAD (téléchargement parallèle)...")
-    with ThreadPoolExecutor(max_workers=2) as executor:
+    logger.info("\n[1-3/3] GTF GENCODE + gnomAD + Mendeliome (téléchargement parallèle)...")
+    with ThreadPoolExecutor(max_workers=3) as executor:
         future_to_key = {
             executor.submit(fn, ref_dir): key
-            for key, (fn, ref_dir) in download_tasks.items()
+            for key, fn in download_tasks.items()
         }
         for future in as_completed(future_to_key):
             key = future_to_key[future]
@@ -233,10 +458,6 @@ def setup_references(ref_dir: Path = REFERENCES_DIR) -> dict:
     if errors:
         raise RuntimeError(f"Échec téléchargement : {errors}")
 
-    # Mendeliome séquentiel (logique de versioning + pagination parallèle interne)
-    logger.info("\n[3/3] Mendeliome Australia (PanelApp)")
-    results["mendeliome"] = download_mendeliome(ref_dir)
-
     logger.info("\n" + "=" * 60)
     logger.info("Références prêtes :")
     for k, v in results.items():
@@ -250,122 +471,249 @@ def setup_references(ref_dir: Path = REFERENCES_DIR) -> dict:
 # ZIP ANALYZER
 # ─────────────────────────────────────────────────────────────
 
+# Regex compilées une seule fois au chargement du module : une seule
+# alternation par outil au lieu de 4-5 re.search() par fichier.
+_FRASER_RE = re.compile(
+    r'(?:fraser.*\.tab$)|(?:fraser.*\.tsv$)|(?:.*fraser.*\.txt$)|(?:fraser[_-]results.*)',
+    re.IGNORECASE,
+)
+_OUTRIDER_RE = re.compile(
+    r'(?:outrider.*\.tab$)|(?:outrider.*\.tsv$)|(?:.*outrider.*\.txt$)'
+    r'|(?:outrider[_-]results.*)|(?:.*htseq.*)',
+    re.IGNORECASE,
+)
+
+# Colonnes requises dans l'en-tête (minuscules) pour valider chaque format
+_FRASER_REQUIRED   = frozenset(('sampleid', 'hgncsymbol', 'pvalue', 'deltapsi'))
+_OUTRIDER_REQUIRED = frozenset(('geneid', 'sampleid', 'zscore', 'pvalue'))
+
+
+def _fast_rmtree(root):
+    """Suppression récursive itérative via os.scandir.
+
+    Évite les lstat/isdir supplémentaires et la récursion Python de
+    shutil.rmtree — sensible quand l'extraction a produit des milliers
+    de petits fichiers.
+    """
+    stack = [(str(root), False)]
+    while stack:
+        path, visited = stack.pop()
+        if visited:
+            os.rmdir(path)
+            continue
+        stack.append((path, True))
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, False))
+                else:
+                    os.unlink(entry.path)
+
+
 class ZipAnalyzer:
     """Analyze and extract RNA-Seq files from ZIP archives"""
 
-    def __init__(self, zip_path):
+    def __init__(self, zip_path, temp_root=None):
         self.zip_path = Path(zip_path)
+        # Racine du répertoire temporaire ; si None, /dev/shm (tmpfs) est
+        # utilisé quand les candidats y tiennent — lectures pandas en RAM
+        self.temp_root = Path(temp_root) if temp_root else None
         self.temp_dir = None
         self.fraser_file = None
         self.outrider_file = None
+        # Handle ZipFile partagé : le répertoire central n'est parsé qu'une
+        # fois ; fermé dans cleanup()
+        self._zip = None
+        # Index des membres (ZipInfo) construit en une seule passe par
+        # extract_zip ; tous les consommateurs lisent cet index au lieu de
+        # re-parcourir l'archive ou le disque
+        self._file_index = []
+        # En-têtes déjà sniffés, par nom de membre : chaque candidat n'est
+        # décompressé qu'une seule fois même s'il est re-testé plus tard
+        self._header_cache = {}
 
     def extract_zip(self):
-        logger.info(f"Extraction de l'archive ZIP : {self.zip_path}")
-        self.temp_dir = Path(tempfile.mkdtemp(prefix="rnaseq_zip_"))
-        with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
-            zip_ref.extractall(self.temp_dir)
-        logger.info(f"Fichiers extraits dans : {self.temp_dir}")
+        """Scanne l'archive et n'extrait QUE les fichiers FRASER/OUTRIDER confirmés.
+
+        L'archive n'est jamais décompressée entièrement : on parcourt le
+        répertoire central (infolist), on filtre par nom via les regex, on
+        sniffe l'en-tête de chaque candidat en streaming, et seuls les
+        fichiers vérifiés sont écrits sur disque.
+        """
+        import tempfile
+        import zipfile
+
+        logger.info(f"Analyse de l'archive ZIP : {self.zip_path}")
+        self._zip = zipfile.ZipFile(self.zip_path, 'r')
+        self._file_index = [i for i in self._zip.infolist() if not i.is_dir()]
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="rnaseq_zip_",
+                                              dir=self._pick_temp_root()))
+
+        fraser_cands, outrider_cands = self._classify()
+
+        for info in fraser_cands:
+            if self._verify_fraser_header(self._peek_header(info)):
+                self.fraser_file = Path(self._zip.extract(info, self.temp_dir))
+                logger.info(f"✓ FRASER : {info.filename}")
+                break
+        for info in outrider_cands:
+            if self._verify_outrider_header(self._peek_header(info)):
+                self.outrider_file = Path(self._zip.extract(info, self.temp_dir))
+                logger.info(f"✓ OUTRIDER : {info.filename}")
+                break
+
+        logger.info(f"Fichiers retenus extraits dans : {self.temp_dir}")
         return self.temp_dir
 
-    def detect_fraser_file(self):
-        logger.info("Détection du fichier FRASER...")
-        patterns = [
-            r'fraser.*\.tab$', r'fraser.*\.tsv$',
-            r'.*fraser.*\.txt$', r'fraser[_-]results.*',
-        ]
-        for root, dirs, files in self.temp_dir.walk():
-            for file in files:
-                for pattern in patterns:
-                    if re.search(pattern, file.lower(), re.IGNORECASE):
-                        candidate = root / file
-                        if self._verify_fraser_format(candidate):
-                            logger.info(f"✓ FRASER : {candidate.relative_to(self.temp_dir)}")
-                            self.fraser_file = candidate
-                            return candidate
-        logger.warning("Fichier FRASER non détecté automatiquement")
+    def _classify(self):
+        """Partitionne l'index en candidats FRASER / OUTRIDER en une passe.
+
+        Les candidats sont ordonnés par vraisemblance d'extension
+        (.tab > .tsv > .txt) : dans le cas courant, un seul en-tête est
+        sniffé par outil.
+        """
+        priority = {'tab': 0, 'tsv': 1, 'txt': 2}
+        fraser_cands, outrider_cands = [], []
+        for info in self._file_index:
+            name = info.filename
+            # Pré-filtre bon marché : extension de données plausible et
+            # taille suffisante pour contenir un en-tête — évite de passer
+            # les .bam/.bai/.html etc. dans les regex
+            suf = name.rsplit('.', 1)[-1].lower()
+            if info.file_size < 64 or suf not in priority:
+                continue
+            if _FRASER_RE.search(name):
+                fraser_cands.append(info)
+            if _OUTRIDER_RE.search(name):
+                outrider_cands.append(info)
+        key = lambda i: priority[i.filename.rsplit('.', 1)[-1].lower()]
+        fraser_cands.sort(key=key)
+        outrider_cands.sort(key=key)
+        return fraser_cands, outrider_cands
+
+    def _pick_temp_root(self):
+        """Choisit la racine du répertoire temporaire.
+
+        Préfère /dev/shm (tmpfs, en RAM) quand les fichiers de données
+        candidats y tiennent largement ; sinon l'emplacement par défaut.
+        """
+        import shutil
+        if self.temp_root is not None:
+            return self.temp_root
+        est = sum(i.file_size for i in self._file_index
+                  if i.filename.lower().endswith(('.tab', '.tsv', '.txt')))
+        try:
+            if os.path.isdir('/dev/shm') and \
+                    shutil.disk_usage('/dev/shm').free > est * 1.2:
+                return '/dev/shm'
+        except OSError:
+            pass
         return None
 
+    def _peek_header(self, info):
+        """Lit l'en-tête d'un membre ZIP sans l'extraire (mémoïsé).
+
+        Lecture bornée à 4 Ko : seuls les premiers blocs DEFLATE sont
+        décompressés, jamais le membre entier.
+        """
+        header = self._header_cache.get(info.filename)
+        if header is None:
+            try:
+                with self._zip.open(info) as fh:
+                    raw = fh.read(4096)
+                lines = raw.decode('utf-8', 'replace').splitlines()
+                header = lines[0].strip().lower() if lines else ''
+            except Exception as e:
+                logger.debug("Erreur lecture en-tête %s: %s", info.filename, e)
+                header = ''
+            self._header_cache[info.filename] = header
+        return header
+
+    def detect_fraser_file(self):
+        if self.fraser_file:
+            logger.info(f"✓ FRASER détecté : {self.fraser_file.name}")
+        else:
+            logger.warning("Fichier FRASER non détecté automatiquement")
+        return self.fraser_file
+
     def detect_outrider_file(self):
-        logger.info("Détection du fichier OUTRIDER...")
-        patterns = [
-            r'outrider.*\.tab$', r'outrider.*\.tsv$',
-            r'.*outrider.*\.txt$', r'outrider[_-]results.*', r'.*htseq.*',
-        ]
-        for root, dirs, files in self.temp_dir.walk():
-            for file in files:
-                for pattern in patterns:
-                    if re.search(pattern, file.lower(), re.IGNORECASE):
-                        candidate = root / file
-                        if self._verify_outrider_format(candidate):
-                            logger.info(f"✓ OUTRIDER : {candidate.relative_to(self.temp_dir)}")
-                            self.outrider_file = candidate
-                            return candidate
-        logger.warning("Fichier OUTRIDER non détecté automatiquement")
-        return None
+        if self.outrider_file:
+            logger.info(f"✓ OUTRIDER détecté : {self.outrider_file.name}")
+        else:
+            logger.warning("Fichier OUTRIDER non détecté automatiquement")
+        return self.outrider_file
 
-    def _verify_fraser_format(self, file_path):
-        try:
-            with open(file_path) as f:
-                header = f.readline().strip().lower()
-                return all(c in header for c in ['sampleid', 'hgncsymbol', 'pvalue', 'deltapsi'])
-        except Exception as e:
-            logger.debug(f"Erreur vérification FRASER {file_path}: {e}")
-            return False
+    def _verify_fraser_header(self, header):
+        return _FRASER_REQUIRED.issubset(header.replace('"', '').split())
 
-    def _verify_outrider_format(self, file_path):
-        try:
-            with open(file_path) as f:
-                header = f.readline().strip().lower()
-                return all(c in header for c in ['geneid', 'sampleid', 'zscore', 'pvalue'])
-        except Exception as e:
-            logger.debug(f"Erreur vérification OUTRIDER {file_path}: {e}")
-            return False
+    def _verify_outrider_header(self, header):
+        return _OUTRIDER_REQUIRED.issubset(header.replace('"', '').split())
 
     def list_all_files(self):
         logger.info("Fichiers présents dans le ZIP :")
-        files = []
-        for root, dirs, filenames in self.temp_dir.walk():
-            for filename in filenames:
-                file_path = root / filename
-                files.append((file_path.relative_to(self.temp_dir), file_path.stat().st_size))
-        files.sort(key=lambda x: x[1], reverse=True)
-        for rel_path, size in files[:20]:
-            logger.info(f"  {rel_path} ({size / 1_048_576:.2f} MB)")
+        files = [(i.filename, i.file_size) for i in self._file_index]
+        # Tri partiel : seuls les 20 plus gros sont triés (O(n log 20))
+        for name, size in heapq.nlargest(20, files, key=lambda x: x[1]):
+            logger.info("  %s (%.2f MB)", name, size / 1_048_576)
         if len(files) > 20:
-            logger.info(f"  ... et {len(files) - 20} autres fichiers")
+            logger.info("  ... et %d autres fichiers", len(files) - 20)
         return files
 
     def manual_file_selection(self):
-        data_files = [f for f in self.temp_dir.rglob('*.*')
-                      if f.suffix.lower() in ['.tsv', '.tab', '.txt']]
-        if not data_files:
+        # Pas de TTY (pipeline CI) : ne jamais bloquer sur input()
+        if not sys.stdin.isatty():
+            logger.error("Mode interactif demandé mais pas de TTY disponible")
+            return False
+
+        data_infos = [i for i in self._file_index
+                      if i.filename.lower().endswith(('.tsv', '.tab', '.txt'))]
+        if not data_infos:
             logger.error("Aucun fichier de données trouvé dans le ZIP")
             return False
 
         print("\n" + "=" * 60)
         print("Sélection manuelle des fichiers")
         print("=" * 60)
-        for i, file in enumerate(data_files, 1):
-            size = file.stat().st_size / 1_048_576
-            print(f"{i:2d}. {file.relative_to(self.temp_dir)} ({size:.2f} MB)")
+        for i, info in enumerate(data_infos, 1):
+            print(f"{i:2d}. {info.filename} ({info.file_size / 1_048_576:.2f} MB)")
 
         for attr, label in [('fraser_file', 'FRASER'), ('outrider_file', 'OUTRIDER')]:
             if not getattr(self, attr):
-                print(f"\nQuel fichier est la sortie {label} ?")
-                try:
-                    choice = int(input("Numéro (0 pour ignorer) : "))
-                    if 1 <= choice <= len(data_files):
-                        setattr(self, attr, data_files[choice - 1])
-                        logger.info(f"Fichier {label} : {getattr(self, attr)}")
-                except (ValueError, KeyboardInterrupt):
-                    logger.warning(f"Sélection {label} ignorée")
+                choice = self._prompt_choice(label, len(data_infos))
+                if choice is not None:
+                    chosen = data_infos[choice - 1]
+                    extracted = Path(self._zip.extract(chosen, self.temp_dir))
+                    setattr(self, attr, extracted)
+                    logger.info(f"Fichier {label} : {extracted}")
 
         return bool(self.fraser_file or self.outrider_file)
 
+    @staticmethod
+    def _prompt_choice(label, n_files):
+        """Demande un numéro de fichier ; None si ignoré, invalide ou EOF."""
+        print(f"\nQuel fichier est la sortie {label} ?")
+        print("Numéro (0 pour ignorer) : ", end="", flush=True)
+        try:
+            line = sys.stdin.readline()
+            if not line:  # EOF
+                return None
+            choice = int(line.strip())
+        except (ValueError, KeyboardInterrupt):
+            logger.warning(f"Sélection {label} ignorée")
+            return None
+        return choice if 1 <= choice <= n_files else None
+
     def cleanup(self):
+        import shutil
+        if self._zip:
+            self._zip.close()
+            self._zip = None
         if self.temp_dir and self.temp_dir.exists():
             logger.info(f"Nettoyage du répertoire temporaire : {self.temp_dir}")
-            shutil.rmtree(self.temp_dir)
+            try:
+                _fast_rmtree(self.temp_dir)
+            except OSError:
+                shutil.rmtree(self.temp_dir, ignore_errors=True)
 
 
 # ─────────────────────────────────────────────────────────────
@@ -13,14 +13,18 @@ Stratégie de parallélisation :
 
 import argparse
 import json
+import multiprocessing
 import os
+import re
 import zipfile
+from collections import deque
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import logging
 import sys
 
+import numpy as np
 import pandas as pd
 
 logging.basicConfig(
@@ -31,94 +35,166 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_WORKERS = min(os.cpu_count() or 4, 16)
 
+# Motifs d'attributs GTF, compiles une fois au chargement du module :
+# str.extract accepte un motif deja compile et evite ainsi la recompilation
+# (et le passage par le cache re) a chaque appel de _parse_gtf.
+_GTF_GENE_ID_RE = re.compile(r'gene_id "([^"]+)"')
+_GTF_GENE_NAME_RE = re.compile(r'gene_name "([^"]+)"')
+
+# Dtypes explicites des colonnes connues : float32 pour les statistiques
+# (precision largement suffisante pour des p-values/z-scores), Int32
+# nullable pour les comptages, category pour les chaines repetitives.
+# read_csv ignore les cles absentes du fichier.
+FRASER_DTYPES = {
+    'sampleID': 'category', 'hgncSymbol': 'category', 'type': 'category',
+    'seqnames': 'category', 'strand': 'category',
+    'pValue': 'float32', 'padjust': 'float32', 'psiValue': 'float32',
+    'deltaPsi': 'float32', 'counts': 'Int32', 'totalCounts': 'Int32',
+    'meanCounts': 'float32', 'meanTotalCounts': 'float32',
+    'nonsplitCounts': 'Int32', 'nonsplitProportion': 'float32',
+    'nonsplitProportion_99quantile': 'float32',
+}
+
+OUTRIDER_DTYPES = {
+    'sampleID': 'category', 'geneID': 'category',
+    'pValue': 'float32', 'padjust': 'float32', 'zScore': 'float32',
+    'l2fc': 'float32', 'rawcounts': 'Int32', 'meanRawcounts': 'float32',
+    'normcounts': 'float32', 'meanCorrected': 'float32',
+    'theta': 'float32', 'AberrantBySample': 'Int32',
+    'AberrantByGene': 'Int32', 'padj_rank': 'float32',
+}
+
+
+def _pool_context():
+    """Contexte multiprocessing pour le pool de samples.
+
+    'forkserver' forke chaque worker depuis un serveur leger ou pandas,
+    numpy et ce module sont deja importes : demarrage en quelques ms au
+    lieu de re-payer l'import de pandas par worker. Repli sur le contexte
+    par defaut quand forkserver n'existe pas (Windows).
+    """
+    try:
+        ctx = multiprocessing.get_context('forkserver')
+        ctx.set_forkserver_preload(['pandas', 'numpy', 'rnaseq_analysis_per_sample'])
+        return ctx
+    except ValueError:
+        return multiprocessing.get_context()
+
 
 # =============================================================================
 # Fonctions module-level (picklables -> ProcessPoolExecutor)
 # =============================================================================
 
+# References partagees du pool : remplies par _init_worker au demarrage de
+# chaque process. Elles sont ainsi picklees une fois par worker au lieu d'une
+# fois par sample dans chaque tuple de tache.
+_GTF_DICT = {}
+_GENE_ANNOT = None
+
+
+def _init_worker(gtf_dict, gene_annot):
+    global _GTF_DICT, _GENE_ANNOT
+    _GTF_DICT = gtf_dict
+    _GENE_ANNOT = gene_annot
+
+
 def _process_and_save_sample(args):
+    """Enveloppe pour executor.map : une tache qui leve ne doit pas faire
+    perdre le reste de son batch. Retourne (sample, paths, n_lignes) en
+    succes, (sample, None, message) en erreur.
+    """
+    try:
+        return _annotate_and_write_sample(args)
+    except Exception as exc:
+        return args[0], None, str(exc)
+
+
+def _annotate_and_write_sample(args):
     """
     Traite et sauvegarde les donnees d'UN sample.
-    Recoit les donnees du sample deja filtrees (en dict pour la picklabilite),
+    Recoit le sous-DataFrame du sample deja filtre (pickle en buffers
+    numpy contigus : dtypes preserves, aucune re-inference cote worker),
     applique les annotations et ecrit le fichier TSV.
     Execute dans un process worker -> vraie parallelisation CPU.
     """
     (
         sample_full,
-        sample_dict,
+        df,
         tool_name,
         files_dir,
-        gtf_dict,
-        gnomad_dict,
-        mendeliome_dict,
         gene_col,
+        output_format,
+        compress,
     ) = args
+    gtf_dict   = _GTF_DICT
+    gene_annot = _GENE_ANNOT
 
     sample_short = sample_full.split('.')[0]
-    filepath = Path(files_dir) / f"{sample_short}.{tool_name}.tab"
-
-    df = pd.DataFrame(sample_dict)
 
     # -- Annotation GTF -------------------------------------------------------
 
     if tool_name == 'outrider' and gtf_dict:
-        by_gene = gtf_dict.get('by_gene', gtf_dict)
-    
-        def _gtf_field(gid, field):
-            if pd.isna(gid):
-                return None
-            return by_gene.get(str(gid).split('.')[0], {}).get(field)
-    
-        for field in ('gene_name', 'chrom', 'start', 'end', 'strand'):
-            df[field] = df['geneID'].apply(lambda x, f=field: _gtf_field(x, f))
-    
-        # Remplacer geneID par le gene_id du GTF (avec numéro de version)
-        df['geneID'] = df['geneID'].apply(
-            lambda gid: _gtf_field(gid, 'gene_id') or gid
-        )
+        by_gene = gtf_dict.get('by_gene')
+
+        if by_gene is not None and 'geneID' in df.columns:
+            # Un seul strip de version + un reindex aligne : les cinq
+            # colonnes arrivent d'un coup (plus de .apply par champ).
+            stripped = df['geneID'].astype(str).str.split('.').str[0]
+            ann = by_gene.reindex(stripped)
+            for field in ('gene_name', 'chrom', 'start', 'end', 'strand'):
+                df[field] = ann[field].to_numpy()
+
+            # Remplacer geneID par le gene_id du GTF (avec numéro de version)
+            df['geneID'] = np.where(ann['gene_id'].notna(),
+                                    ann['gene_id'].to_numpy(object),
+                                    df['geneID'].to_numpy(object))
         # Renommer la colonne
         df.rename(columns={'geneID': 'gene_id'}, inplace=True)
-    
+
         if 'gene_name' in df.columns and df['gene_name'].notna().any():
             gene_col = 'gene_name'
 
     elif tool_name == 'fraser':
         df['chrom'] = df.get('seqnames', pd.Series(dtype=str))
-    
-        # ← NOUVEAU : résolution gene_name par overlap de coordonnées
-        if gtf_dict and 'by_chrom' in gtf_dict:
-            by_chrom = gtf_dict['by_chrom']
-    
-            def _resolve_fraser_gene(row):
-                chrom   = str(row.get('seqnames', ''))
-                start   = row.get('start', 0)
-                end     = row.get('end', 0)
-                for e in by_chrom.get(chrom, []):
-                    if e['start'] <= end and e['end'] >= start:
-                        return e['gene_name'], e['gene_id']
-                return None, None
-    
-            df[['gene_name', 'gene_id']] = df.apply(
-                _resolve_fraser_gene, axis=1, result_type='expand'
-            )
-    
+
+        # Résolution gene_name par overlap de coordonnées, vectorisée :
+        # une recherche binaire par ligne sur l'index trié (voir
+        # _gtf_to_dict) au lieu d'un scan Python de tous les gènes du
+        # chromosome pour chaque ligne.
+        if gtf_dict and 'by_chrom' in gtf_dict and len(df):
+            by_chrom   = gtf_dict['by_chrom']
+            gene_name  = np.full(len(df), None, dtype=object)
+            gene_id    = np.full(len(df), None, dtype=object)
+            chroms_q   = (df['seqnames'].astype(str).to_numpy()
+                          if 'seqnames' in df.columns
+                          else np.full(len(df), '', dtype=object))
+            starts_q   = (pd.to_numeric(df['start'], errors='coerce')
+                          .fillna(0).to_numpy(np.int64)
+                          if 'start' in df.columns else np.zeros(len(df), np.int64))
+            ends_q     = (pd.to_numeric(df['end'], errors='coerce')
+                          .fillna(0).to_numpy(np.int64)
+                          if 'end' in df.columns else np.zeros(len(df), np.int64))
+            for chrom in np.unique(chroms_q):
+                index = by_chrom.get(chrom)
+                if index is None:
+                    continue
+                sel   = np.nonzero(chroms_q == chrom)[0]
+                pos   = np.searchsorted(index['max_end'], starts_q[sel], side='left')
+                pos_c = np.minimum(pos, index['starts'].size - 1)
+                ok    = (pos < index['starts'].size) \
+                        & (index['starts'][pos_c] <= ends_q[sel])
+                hits  = sel[ok]
+                gene_name[hits] = index['gene_name'][pos_c[ok]]
+                gene_id[hits]   = index['gene_id'][pos_c[ok]]
+            df['gene_name'] = gene_name
+            df['gene_id']   = gene_id
+
         if 'gene_name' in df.columns and df['gene_name'].notna().any():
             gene_col = 'gene_name'
             
-    # -- Annotation gnomAD ----------------------------------------------------
-    if gnomad_dict and gene_col in df.columns:
-        for metric in ('pLI', 'oe_lof', 'lof_z', 'mis_z', 'syn_z',
-                       'constraint_flag', 'oe_mis', 'oe_syn'):
-            df[metric] = df[gene_col].map(
-                lambda g, m=metric: gnomad_dict.get(str(g), {}).get(m)
-            )
-
-    # -- Annotation Mendeliome ------------------------------------------------
-    if mendeliome_dict and gene_col in df.columns:
-        for col in ('Mode_Of_Inheritance', 'Phenotypes'):
-            df[col] = df[gene_col].map(
-                lambda g, c=col: mendeliome_dict.get(str(g), {}).get(c)
-            )
+    # -- Annotation gnomAD + Mendeliome (une seule jointure m:1 sur le gene)
+    if gene_annot is not None and gene_col in df.columns:
+        df = df.join(gene_annot, on=gene_col, validate='m:1')
 
     # -- Selection et ordre des colonnes de sortie ----------------------------
     if tool_name == 'fraser':
@@ -142,8 +218,30 @@ def _process_and_save_sample(args):
         ]
 
     out_cols = [c for c in ordered if c in df.columns]
-    df[out_cols].to_csv(filepath, sep='\t', index=False)
-    return filepath, len(df), sample_short
+    out = df[out_cols]
+    paths = []
+    if output_format in ('tsv', 'both'):
+        path = Path(files_dir) / f"{sample_short}.{tool_name}.tab"
+        kwargs = {}
+        if compress == 'gzip':
+            path = path.with_name(path.name + '.gz')
+            kwargs['compression'] = 'gzip'
+        elif compress == 'zstd':
+            path = path.with_name(path.name + '.zst')
+            kwargs['compression'] = {'method': 'zstd', 'level': 3}
+        out.to_csv(path, sep='\t', index=False, **kwargs)
+        paths.append(path)
+    if output_format in ('parquet', 'both'):
+        path = Path(files_dir) / f"{sample_short}.{tool_name}.parquet"
+        # category -> encodage dictionnaire Parquet pour les colonnes repetitives
+        cats = out.copy()
+        for col in ('sampleID', 'gene_name', 'hgncSymbol', 'chrom',
+                    'strand', 'seqnames', 'type'):
+            if col in cats.columns:
+                cats[col] = cats[col].astype('category')
+        cats.to_parquet(path, compression='zstd')
+        paths.append(path)
+    return sample_full, paths, len(df)
 
 
 # =============================================================================
@@ -155,46 +253,72 @@ def _gtf_to_dict(gtf_df):
         return {}
     gtf_df = gtf_df.copy()
     gtf_df['gene_id_clean'] = gtf_df['gene_id'].str.split('.').str[0]
-    
+
+    # Index d'overlap par chromosome : tableaux numpy tries par start +
+    # maximum prefixe des ends. Chercher le premier gene chevauchant
+    # [qstart, qend] devient deux operations vectorisees :
+    #   i = searchsorted(max_end, qstart)   # premier gene dont le end atteint qstart
+    #   chevauchement ssi starts[i] <= qend
+    # (a l'indice i le prefixe vient de croitre, donc end[i] = max_end[i]).
     by_chrom = {}
-    for _, row in gtf_df.iterrows():
-        chrom = row['chrom'].replace('chr', '')
-        by_chrom.setdefault(chrom, []).append({
-            'gene_id':   row['gene_id_clean'],
-            'gene_name': row['gene_name'],
-            'start':     row['start'],
-            'end':       row['end'],
-            'strand':    row['strand'],
-        })
-    
-    # Dict par gene_id (OUTRIDER, inchangé)
+    chrom_key = gtf_df['chrom'].astype(str).str.replace('chr', '', regex=False)
+    for chrom, grp in gtf_df.groupby(chrom_key, sort=False):
+        grp = grp.sort_values('start', kind='mergesort')
+        by_chrom[chrom] = {
+            'starts':    grp['start'].to_numpy(np.int64),
+            'max_end':   np.maximum.accumulate(grp['end'].to_numpy(np.int64)),
+            'gene_name': grp['gene_name'].to_numpy(object),
+            'gene_id':   grp['gene_id_clean'].to_numpy(object),
+        }
+
+
+    # DataFrame indexe par gene_id sans version (OUTRIDER) : un reindex
+    # vectorise cote worker au lieu d'un dict interroge ligne a ligne.
     by_gene = (
         gtf_df.set_index('gene_id_clean')
-        [['gene_id','gene_name', 'chrom', 'start', 'end', 'strand']]
-        .to_dict('index')
+        [['gene_id', 'gene_name', 'chrom', 'start', 'end', 'strand']]
     )
-    
+    by_gene = by_gene[~by_gene.index.duplicated(keep='last')]
+
+
     return {'by_gene': by_gene, 'by_chrom': by_chrom}
 
-def _gnomad_to_dict(gnomad_df):
+def _gnomad_to_frame(gnomad_df):
+    """DataFrame indexe par gene : une jointure cote worker au lieu de
+    huit .map (un par metrique) sur des dicts imbriques."""
     if gnomad_df is None:
-        return {}
-    wanted = ["pLI", "oe_lof", "lof_z", "mis_z", "syn_z",
-              "constraint_flag", "oe_mis", "oe_syn"]
+        return None
+    # Seules les metriques reellement ecrites en sortie (listes `ordered`
+    # du worker) sont embarquees : inutile de pickler et joindre le reste.
+    wanted = ["pLI", "oe_lof", "lof_z", "mis_z"]
     cols = [c for c in wanted if c in gnomad_df.columns]
     df = gnomad_df[["gene"] + cols].copy()
     if "pLI" in df.columns:
         df = df.sort_values("pLI", ascending=False)
     df = df.drop_duplicates(subset="gene", keep="first")
-    return df.set_index("gene")[cols].to_dict("index")
+    return df.set_index("gene")[cols]
 
 
-def _mendeliome_to_dict(mendel_df):
+def _mendeliome_to_frame(mendel_df):
     if mendel_df is None:
-        return {}
-    cols = [c for c in ('confidence_level', 'Mode_Of_Inheritance', 'Phenotypes')
+        return None
+    cols = [c for c in ('Mode_Of_Inheritance', 'Phenotypes')
             if c in mendel_df.columns]
-    return mendel_df.set_index('gene_symbol')[cols].to_dict('index')
+    return mendel_df.set_index('gene_symbol')[cols]
+
+
+def _gene_annotations(gnomad_ref, mendeliome_ref):
+    """Table unique d'annotations par gene (union gnomAD + Mendeliome).
+
+    Les workers font une seule jointure au lieu d'une par reference, et
+    la table de hachage cote droit n'est construite qu'une fois.
+    """
+    frames = [f for f in (gnomad_ref, mendeliome_ref) if f is not None]
+    if not frames:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    return frames[0].join(frames[1], how='outer')
 
 
 # =============================================================================
@@ -207,7 +331,8 @@ class RNASeqProcessorPerSample:
     def __init__(self, fraser_file, outrider_file, samples_file, gtf_file,
                  output_dir, gnomad_file=None, mendeliome_file=None,
                  mode='samples', pvalue_filter=None, create_zip=True,
-                 partial_match=False, workers=DEFAULT_WORKERS):
+                 partial_match=False, workers=DEFAULT_WORKERS,
+                 output_format='tsv', compress='none'):
 
         self.fraser_file     = Path(fraser_file)     if fraser_file     else None
         self.outrider_file   = Path(outrider_file)   if outrider_file   else None
@@ -222,6 +347,8 @@ class RNASeqProcessorPerSample:
         self.create_zip    = create_zip
         self.partial_match = partial_match
         self.workers       = workers
+        self.output_format = output_format
+        self.compress      = compress
 
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.files_dir = self.output_dir / "per_sample_files"
@@ -234,10 +361,9 @@ class RNASeqProcessorPerSample:
         self.gnomad_data     = None
         self.mendeliome_data = None
 
-        # Dicts picklables (calcules une seule fois avant le pool de process)
-        self._gtf_dict        = None
-        self._gnomad_dict     = None
-        self._mendeliome_dict = None
+        # Structures picklables (calculees une seule fois avant le pool)
+        self._gtf_dict   = None
+        self._gene_annot = None
 
     # -------------------------------------------------------------------------
     # Chargement
@@ -249,16 +375,51 @@ class RNASeqProcessorPerSample:
             self.samples = None
             return None
         logger.info(f"Chargement des samples depuis {self.samples_file}")
-        with open(self.samples_file) as f:
-            self.samples = [l.strip() for l in f if l.strip()]
+        # Lecture en un seul read() + splitlines : pas d'iteration ligne a
+        # ligne cote Python, et splitlines gere aussi les fins CRLF.
+        raw = Path(self.samples_file).read_bytes()
+        self.samples = [s.decode().strip() for s in raw.splitlines() if s.strip()]
         logger.info(f"{len(self.samples)} samples charges")
         return self.samples
 
+    def _read_filtered_tsv(self, path, index_col=None, dtypes=None):
+        """Lit un TSV par chunks en poussant les filtres dans la lecture.
+
+        Les lignes ecartees (p-value, samples en correspondance exacte)
+        ne sont jamais conservees : la memoire de pointe suit la taille
+        du resultat filtre, pas celle du fichier. Le filtrage partiel
+        (partial_match) reste fait en aval dans _filter_data.
+        """
+        sample_set = (set(self.samples)
+                      if self.mode != 'all' and self.samples and not self.partial_match
+                      else None)
+        chunks = []
+        total = 0
+        for chunk in pd.read_csv(path, sep='\t', index_col=index_col,
+                                 dtype=dtypes, chunksize=1_000_000):
+            total += len(chunk)
+            if sample_set is not None and 'sampleID' in chunk.columns:
+                chunk = chunk[chunk['sampleID'].isin(sample_set)]
+            if self.pvalue_filter is not None and 'padjust' in chunk.columns:
+                chunk = chunk[chunk['padjust'] < self.pvalue_filter]
+            chunks.append(chunk)
+        data = pd.concat(chunks) if chunks else pd.DataFrame()
+        # Colonnes tres repetitives -> category : codes entiers pour les
+        # isin/groupby/jointures en aval et memoire chaine divisee d'autant.
+        for col in ('sampleID', 'hgncSymbol', 'geneID', 'type',
+                    'seqnames', 'strand'):
+            if col in data.columns:
+                data[col] = data[col].astype('category')
+        if len(data) != total:
+            logger.info(f"  filtres pousses a la lecture : {total:,} -> {len(data):,}")
+        return data
+
     def load_fraser(self):
         if self.fraser_file is None:
             return None
         logger.info(f"Chargement FRASER : {self.fraser_file}")
-        self.fraser_data = pd.read_csv(self.fraser_file, sep='\t', low_memory=False)
+        self.fraser_data = self._read_filtered_tsv(self.fraser_file,
+                                                   dtypes=FRASER_DTYPES)
         logger.info(f"  -> {len(self.fraser_data):,} enregistrements")
         return self.fraser_data
 
@@ -273,50 +434,82 @@ class RNASeqProcessorPerSample:
     def load_outrider(self):
         """Load OUTRIDER data"""
         logger.info(f"Loading OUTRIDER data from {self.outrider_file}")
-        self.outrider_data = pd.read_csv(
-            self.outrider_file,
-            sep='\t',
-            low_memory=False,
-            index_col=0  # ignore la colonne d'index R
-        )
+        # index_col=0 : ignore la colonne d'index R
+        self.outrider_data = self._read_filtered_tsv(self.outrider_file, index_col=0,
+                                                     dtypes=OUTRIDER_DTYPES)
         logger.info(f"Loaded {len(self.outrider_data)} OUTRIDER records")
         return self.outrider_data
 
+    def _load_cached(self, src, parse):
+        """Cache disque du resultat d'un loader de reference.
+
+        Cle = (mtime, taille) du fichier source ; le DataFrame parse est
+        pickle a cote du fichier (<src>.cache.pkl). Les runs suivants
+        rechargent en quelques ms au lieu de re-parser. Pickle plutot
+        que Parquet : aucune dependance supplementaire. Toute erreur de
+        cache (corrompu, dossier en lecture seule) retombe sur le parse.
+        """
+        cache = src.with_name(src.name + '.cache.pkl')
+        st = src.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        if cache.exists():
+            try:
+                payload = pd.read_pickle(cache)
+                if payload.get('key') == key:
+                    logger.info(f"  cache : {cache.name}")
+                    return payload['data']
+            except Exception as e:
+                logger.debug("Cache illisible %s : %s", cache, e)
+        data = parse()
+        try:
+            pd.to_pickle({'key': key, 'data': data}, cache)
+        except OSError as e:
+            logger.debug("Cache non ecrit %s : %s", cache, e)
+        return data
+
     def load_gtf(self):
         logger.info(f"Chargement GTF : {self.gtf_file}")
-        records = []
-        with open(self.gtf_file) as f:
-            for line in f:
-                if line.startswith('#'):
-                    continue
-                fields = line.strip().split('\t')
-                if len(fields) < 9 or fields[2] != 'gene':
-                    continue
-                attrs = {}
-                for attr in fields[8].split(';'):
-                    attr = attr.strip()
-                    if not attr:
-                        continue
-                    kv = attr.split(' ', 1)
-                    if len(kv) == 2:
-                        attrs[kv[0]] = kv[1].strip('"')
-                records.append({
-                    'chrom':     fields[0],
-                    'start':     int(fields[3]),
-                    'end':       int(fields[4]),
-                    'strand':    fields[6],
-                    'gene_id':   attrs.get('gene_id'),
-                    'gene_name': attrs.get('gene_name'),
-                })
-        self.gtf_data = pd.DataFrame(records)
+        self.gtf_data = self._load_cached(self.gtf_file, self._parse_gtf)
         logger.info(f"  -> {len(self.gtf_data):,} genes")
         return self.gtf_data
 
+    def _parse_gtf(self):
+        """Parse vectorise du GTF : tokenizer C de read_csv + str.extract.
+
+        Les ~3M lignes passent par le parseur C (comment='#'), le masque
+        feat == 'gene' ne garde que les genes, puis deux str.extract
+        vectorises recuperent gene_id/gene_name — plus aucune boucle
+        Python par ligne.
+        """
+        # Lecture par chunks : seules les lignes 'gene' (~2% du fichier)
+        # sont conservees, la memoire de pointe reste bornee au chunk.
+        kept = []
+        for chunk in pd.read_csv(
+                self.gtf_file, sep='\t', comment='#', header=None,
+                names=['chrom', 'src', 'feat', 'start', 'end',
+                       'score', 'strand', 'frame', 'attrs'],
+                usecols=['chrom', 'feat', 'start', 'end', 'strand', 'attrs'],
+                dtype={'start': 'int32', 'end': 'int32'},
+                chunksize=500_000):
+            kept.append(chunk[chunk['feat'] == 'gene'])
+        df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame(
+            columns=['chrom', 'feat', 'start', 'end', 'strand', 'attrs'])
+        out = df[['chrom', 'start', 'end', 'strand']].copy()
+        out['gene_id']   = df['attrs'].str.extract(_GTF_GENE_ID_RE, expand=False)
+        out['gene_name'] = df['attrs'].str.extract(_GTF_GENE_NAME_RE, expand=False)
+        # Cast apres concat (les categories par chunk ne seraient pas alignees)
+        out['chrom']  = out['chrom'].astype('category')
+        out['strand'] = out['strand'].astype('category')
+        return out
+
     def load_gnomad(self):
         if self.gnomad_file is None:
             return None
         logger.info(f"Chargement gnomAD : {self.gnomad_file}")
-        self.gnomad_data = pd.read_csv(self.gnomad_file, sep='\t', low_memory=False)
+        self.gnomad_data = self._load_cached(
+            self.gnomad_file,
+            lambda: pd.read_csv(self.gnomad_file, sep='\t', low_memory=False),
+        )
         logger.info(f"  -> {len(self.gnomad_data):,} genes")
         return self.gnomad_data
 
@@ -327,8 +520,13 @@ class RNASeqProcessorPerSample:
             logger.warning(f"Mendeliome introuvable : {self.mendeliome_file}")
             return None
         logger.info(f"Chargement Mendeliome JSON : {self.mendeliome_file}")
-        with open(self.mendeliome_file) as f:
-            payload = json.load(f)
+        raw = self.mendeliome_file.read_bytes()
+        try:
+            # orjson (optionnel) : parse C ~3x plus rapide, API identique
+            import orjson
+            payload = orjson.loads(raw)
+        except ImportError:
+            payload = json.loads(raw)
         version = payload.get("version", "?")
         records = []
         for entry in payload.get("genes", []):
@@ -343,9 +541,12 @@ class RNASeqProcessorPerSample:
                 "Mode_Of_Inheritance": entry.get("mode_of_inheritance", ""),
                 "Phenotypes":          " | ".join(p for p in phenotypes if p),
             })
+        # confidence_level ne prend que 4 valeurs ("0".."3") : encodage
+        # dictionnaire -> comparaisons sur codes int8 au lieu de chaînes.
         self.mendeliome_data = (
             pd.DataFrame(records)
             .drop_duplicates(subset="gene_symbol")
+            .astype({"confidence_level": "category"})
         )
         n_green = (self.mendeliome_data["confidence_level"] == "3").sum()
         logger.info(
@@ -365,13 +566,17 @@ class RNASeqProcessorPerSample:
             "OUTRIDER":   self.load_outrider,
         }
         errors = {}
-        with ThreadPoolExecutor(max_workers=len(tasks)) as ex:
+        # Pool volontairement petit : read_csv ne libere le GIL que pendant
+        # la tokenisation C ; au-dela de 2-3 parsers concurrents, la
+        # construction des DataFrames (cote objets Python) se dispute le
+        # GIL et les threads supplementaires n'apportent plus rien.
+        with ThreadPoolExecutor(max_workers=min(len(tasks), 3)) as ex:
             futures = {ex.submit(fn): name for name, fn in tasks.items()}
             for future in as_completed(futures):
                 name = futures[future]
                 try:
                     future.result()
-                    logger.info(f"  OK {name}")
+                    logger.info("  OK %s", name)
                 except Exception as e:
                     errors[name] = e
                     logger.error(f"  ERREUR {name} : {e}")
@@ -384,12 +589,13 @@ class RNASeqProcessorPerSample:
         # Conversion en dicts picklables une seule fois pour tous les workers
         logger.info("Construction des dicts picklables pour ProcessPool...")
         self._gtf_dict        = _gtf_to_dict(self.gtf_data)
-        self._gnomad_dict     = _gnomad_to_dict(self.gnomad_data)
-        self._mendeliome_dict = _mendeliome_to_dict(self.mendeliome_data)
+        gnomad_ref       = _gnomad_to_frame(self.gnomad_data)
+        mendeliome_ref   = _mendeliome_to_frame(self.mendeliome_data)
+        self._gene_annot = _gene_annotations(gnomad_ref, mendeliome_ref)
         logger.info(
             f"  GTF : {len(self._gtf_dict):,} | "
-            f"gnomAD : {len(self._gnomad_dict):,} | "
-            f"Mendeliome : {len(self._mendeliome_dict):,}"
+            f"gnomAD : {0 if gnomad_ref is None else len(gnomad_ref):,} | "
+            f"Mendeliome : {0 if mendeliome_ref is None else len(mendeliome_ref):,}"
         )
 
     # -------------------------------------------------------------------------
@@ -399,33 +605,44 @@ class RNASeqProcessorPerSample:
     def _get_matched_samples(self, data_samples):
         if self.mode == 'all':
             return list(data_samples)
-        matched = []
         if self.partial_match:
-            for ds in data_samples:
-                if any(ls in ds for ls in self.samples):
-                    matched.append(ds)
+            if not self.samples:
+                # Liste vide : ne rien matcher (l'alternation vide '' de
+                # re.compile matcherait sinon tous les IDs, soit le mode 'all')
+                matched, found = [], set()
+            else:
+                # Alternation compilee une fois : un scan C par ID au lieu de
+                # len(samples) tests de sous-chaine Python par ID.
+                pat = re.compile('|'.join(re.escape(ls) for ls in self.samples))
+                matched = [ds for ds in data_samples if pat.search(ds)]
+                found = {ls for ds in matched
+                         for ls in self.samples if ls in ds}
         else:
             s_set = set(self.samples)
             matched = [s for s in data_samples if s in s_set]
+            found = s_set & set(matched)
         logger.info(f"{len(matched)}/{len(self.samples or [])} samples trouves")
-        found = set()
-        for ds in matched:
-            for ls in (self.samples or []):
-                if (self.partial_match and ls in ds) or ls == ds:
-                    found.add(ls)
         not_found = set(self.samples or []) - found
         if not_found:
             logger.warning(f"Samples non trouves : {sorted(not_found)}")
         return matched
 
     def _filter_data(self, data, label):
-        if self.mode != 'all':
-            matched = self._get_matched_samples(data['sampleID'].unique())
-            data = data[data['sampleID'].isin(matched)].copy()
+        # Masques fusionnes : une seule selection .loc a la fin au lieu
+        # d'un DataFrame intermediaire par filtre. Pas de .copy() : le
+        # resultat n'est jamais modifie en place (les workers repartent
+        # de to_dict).
+        # P-value d'abord : comparaison numerique bon marche qui elimine
+        # le gros des lignes avant le matching de samples (chaines).
+        mask = pd.Series(True, index=data.index)
         if self.pvalue_filter is not None:
-            n_before = len(data)
-            data = data[data['padjust'] < self.pvalue_filter].copy()
-            logger.info(f"Filtre p-value ({label}) : {n_before:,} -> {len(data):,}")
+            mask = data['padjust'] < self.pvalue_filter
+            logger.info(f"Filtre p-value ({label}) : {len(data):,} -> {int(mask.sum()):,}")
+        if self.mode != 'all':
+            matched = self._get_matched_samples(
+                data.loc[mask, 'sampleID'].unique())
+            mask &= data['sampleID'].isin(set(matched))
+        data = data.loc[mask]
         logger.info(f"{label} filtre : {len(data):,} enregistrements")
         return data
 
@@ -436,44 +653,51 @@ class RNASeqProcessorPerSample:
     def _run_tool_parallel(self, data, tool_name, gene_col):
         """
         Repartit les samples sur self.workers process.
-        Chaque process recoit les donnees d'UN sample + les dicts de reference
-        et effectue annotation + ecriture de facon totalement independante.
+        Chaque process recoit les donnees d'UN sample (les references sont
+        deja en place via l'initializer du pool) et effectue annotation +
+        ecriture de facon totalement independante.
         -> Vraie parallelisation CPU : pas de GIL, pas de partage memoire.
         """
-        unique_samples = data['sampleID'].unique()
+        # Partition en UNE passe lineaire (groupby) au lieu d'un scan
+        # complet du DataFrame par sample.
+        groups = data.groupby('sampleID', sort=False, observed=True)
+        n_samples = groups.ngroups
         logger.info(
-            f"Traitement {tool_name} : {len(unique_samples)} samples "
+            f"Traitement {tool_name} : {n_samples} samples "
             f"sur {self.workers} workers"
         )
 
         tasks = [
             (
                 sample,
-                data[data['sampleID'] == sample].to_dict('list'),
+                grp.reset_index(drop=True),
                 tool_name,
                 str(self.files_dir),
-                self._gtf_dict,
-                self._gnomad_dict,
-                self._mendeliome_dict,
                 gene_col,
+                self.output_format,
+                self.compress,
             )
-            for sample in unique_samples
+            for sample, grp in groups
         ]
 
         saved_files = []
-        with ProcessPoolExecutor(max_workers=self.workers) as executor:
-            futures = {executor.submit(_process_and_save_sample, t): t[0]
-                       for t in tasks}
-            for future in as_completed(futures):
-                sample = futures[future]
-                try:
-                    filepath, n_records, short = future.result()
-                    saved_files.append(filepath)
-                    logger.info(f"  OK {filepath.name} ({n_records} lignes)")
-                except Exception as exc:
-                    logger.error(f"  ERREUR {sample} : {exc}")
-
-        logger.info(f"{len(saved_files)}/{len(unique_samples)} fichiers {tool_name} crees")
+        # map + chunksize : dispatch par lots, un aller-retour pickle par
+        # batch au lieu d'un Future par sample.
+        chunk = max(1, len(tasks) // (4 * self.workers))
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=_pool_context(),
+                                 initializer=_init_worker,
+                                 initargs=(self._gtf_dict,
+                                           self._gene_annot)) as executor:
+            for sample, paths, info in executor.map(
+                    _process_and_save_sample, tasks, chunksize=chunk):
+                if paths is None:
+                    logger.error(f"  ERREUR {sample} : {info}")
+                else:
+                    saved_files.extend(paths)
+                    logger.info("  OK %s (%d lignes)", paths[0].name, info)
+
+        logger.info(f"{len(saved_files)}/{n_samples} fichiers {tool_name} crees")
         return saved_files
 
     def process_fraser(self):
@@ -501,9 +725,23 @@ class RNASeqProcessorPerSample:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         zip_path  = self.output_dir / f"run_{timestamp}.zip"
         logger.info(f"Creation ZIP : {zip_path.name} ({len(files_list)} fichiers)")
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        # Les lectures disque sont prefetchees par un petit pool (fenetre
+        # bornee pour ne pas tout charger en RAM) pendant que le thread
+        # principal compresse et ecrit — zlib libere le GIL pendant le
+        # DEFLATE, donc lecture du fichier suivant et compression du
+        # courant se recouvrent. zipfile ne supporte pas l'ecriture
+        # concurrente de membres : l'ecriture reste sequentielle.
+        pending = deque()
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf, \
+                ThreadPoolExecutor(max_workers=2) as ex:
             for fp in files_list:
-                zf.write(fp, Path(fp).name)
+                pending.append((Path(fp).name, ex.submit(Path(fp).read_bytes)))
+                if len(pending) >= 4:
+                    name, fut = pending.popleft()
+                    zf.writestr(name, fut.result())
+            while pending:
+                name, fut = pending.popleft()
+                zf.writestr(name, fut.result())
         logger.info(f"ZIP cree : {zip_path}")
         return zip_path
 
@@ -583,6 +821,12 @@ Workers par defaut : {DEFAULT_WORKERS} (base sur les CPU disponibles)
     parser.add_argument('--gnomad')
     parser.add_argument('--mendeliome')
     parser.add_argument('--no-zip', action='store_true')
+    parser.add_argument('--output-format', choices=['tsv', 'parquet', 'both'],
+                        default='tsv',
+                        help='Format des fichiers par sample (parquet requiert pyarrow)')
+    parser.add_argument('--compress', choices=['none', 'gzip', 'zstd'],
+                        default='none',
+                        help='Compression des TSV par sample (zstd requiert zstandard)')
     parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
     parser.add_argument('--verbose', action='store_true')
 
@@ -593,6 +837,24 @@ Workers par defaut : {DEFAULT_WORKERS} (base sur les CPU disponibles)
     if not args.fraser and not args.outrider:
         parser.error("Au moins --fraser ou --outrider est requis")
 
+    # Valider les dependances optionnelles avant de lancer le pool : sinon
+    # chaque worker echouerait dans to_csv/to_parquet apres avoir deja
+    # ecrit une partie des fichiers du sample.
+    if args.output_format in ('parquet', 'both'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            try:
+                import fastparquet  # noqa: F401
+            except ImportError:
+                parser.error(
+                    "--output-format parquet requiert pyarrow ou fastparquet")
+    if args.compress == 'zstd':
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            parser.error("--compress zstd requiert le paquet zstandard")
+
     if args.verbose:
         logger.setLevel(logging.DEBUG)
 
@@ -609,6 +871,8 @@ Workers par defaut : {DEFAULT_WORKERS} (base sur les CPU disponibles)
         create_zip=not args.no_zip,
         partial_match=args.partial_match,
         workers=args.workers,
+        output_format=args.output_format,
+        compress=args.compress,
     )
 
     try: